@@ -29,7 +29,11 @@ __all__ = [
   'find_module',
   'iter_package_files',
   'DiscoveryResult',
-  'discover'
+  'discover',
+  'EXCLUDE_PATTERNS',
+  'FoundModule',
+  'RelPathPattern',
+  'find_module_roots',
 ]
 
 import io
@@ -42,6 +46,7 @@ from pathlib import Path
 from nr.util.fs import recurse_directory
 
 from docspec import Argument, Module
+from .discovery import EXCLUDE_PATTERNS, FoundModule, RelPathPattern, TRelPathPattern, find_module_roots
 from .parser import Parser, ParserOptions
 
 
@@ -218,26 +223,24 @@ DiscoveryResult.Module = _Module
 DiscoveryResult.Package = _Package
 
 
-def discover(directory: t.Union[str, Path]) -> t.Iterable[DiscoveryResult]:
+def discover(
+  directory: t.Union[str, Path],
+  exclude: t.Sequence[TRelPathPattern] = EXCLUDE_PATTERNS,
+) -> t.Iterable[DiscoveryResult]:
   """
-  Discovers Python modules and packages in the specified *directory*. The returned generated
-  returns tuples where the first element of the tuple is the type (either `'module'` or
-  `'package'`), the second is the name and the third is the path. In case of a package,
-  the path points to the directory.
+  Discovers Python modules and packages in the specified *directory*, descending into
+  namespace packages (both PEP 420 and `pkgutil`/`pkg_resources` style) to report their
+  children individually. Paths matching one of the gitignore-style *exclude* patterns
+  are skipped (see #find_module_roots()).
 
-  :raises OSError: Propagated from #os.listdir().
+  :raises OSError: Propagated from #os.scandir().
   """
 
-  # TODO (@NiklasRosenstein): Introspect the contents of __init__.py files to determine
-  #   if we're looking at a namespace package. If we do, continue recursively.
-
-  for name in os.listdir(directory):
-    if name.endswith('.py') and name.count('.') == 1:
-      yield DiscoveryResult.Module(name[:-3], os.path.join(directory, name))
+  for root in find_module_roots(directory, exclude):
+    if root.is_package_dir:
+      yield DiscoveryResult.Package(root.name, str(root.abs_path))
     else:
-      full_path = os.path.join(directory, name, '__init__.py')
-      if os.path.isfile(full_path):
-        yield DiscoveryResult.Package(name, os.path.join(directory, name))
+      yield DiscoveryResult.Module(root.name, str(root.abs_path))
 
 
 def format_arglist(args: t.Sequence[Argument], render_type_hints: bool = True) -> str:
@@ -0,0 +1,177 @@
+# -*- coding: utf8 -*-
+# Copyright (c) 2020 Niklas Rosenstein
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to
+# deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or
+# sell copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+""" Tests module/package root discovery, including namespace-package handling and the
+gitignore-style exclude patterns. """
+
+import re
+from pathlib import Path
+
+import pytest
+
+from docspec_python import EXCLUDE_PATTERNS, DiscoveryResult, discover, find_module_roots
+from docspec_python.discovery import RelPathPattern, _compiled_exclude_regexes
+
+PKGUTIL_INIT = "__path__ = __import__('pkgutil').extend_path(__path__, __name__)\n"
+
+
+def _touch(path: Path, contents: str = '') -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  path.write_text(contents)
+
+
+def test_rel_path_pattern_matching(tmp_path: Path) -> None:
+  """ Tests the gitignore-style semantics of #RelPathPattern. """
+
+  (tmp_path / 'a' / 'b').mkdir(parents=True)
+
+  def match(pattern: str, rel_path: str) -> bool:
+    return RelPathPattern(pattern).is_match(Path(rel_path), tmp_path)
+
+  # Unanchored patterns match at any depth; matching a directory matches its contents.
+  assert match('b', 'a/b/c.py')
+  assert match('*.py', 'a/b/c.py')
+  assert not match('d', 'a/b/c.py')
+
+  # Anchored patterns only match from the root.
+  assert match('/a', 'a/b/c.py')
+  assert not match('/b', 'a/b/c.py')
+
+  # `**` spans zero or more components.
+  assert match('a/**/c.py', 'a/b/c.py')
+  assert match('a/**/b', 'a/b/c.py')
+  assert match('/**/c.py', 'a/b/c.py')
+
+  # A trailing `**` matches zero components in the regex rendering as well,
+  # keeping it in agreement with is_match().
+  assert match('a/**', 'a/b/c.py')
+  fragment = re.compile(RelPathPattern('a/**').as_regex_fragment())
+  assert fragment.search('a')
+  assert fragment.search('a/b/c.py')
+  assert not fragment.search('ab')
+
+  # Dir-only patterns do not match files.
+  assert match('b/', 'a/b/c.py')
+  assert not match('c.py/', 'a/b/c.py')
+
+  # A custom (e.g. memoized) is_dir can be injected for dir-only patterns.
+  seen = []
+  def fake_is_dir(path: Path) -> bool:
+    seen.append(path)
+    return True
+  assert RelPathPattern('c.py/').is_match(Path('a/b/c.py'), tmp_path, is_dir=fake_is_dir)
+  assert seen == [tmp_path / 'a' / 'b' / 'c.py']
+
+
+def test_find_module_roots(tmp_path: Path) -> None:
+  """ Tests that #find_module_roots() collapses packages to their root and skips
+  excluded directories. """
+
+  _touch(tmp_path / 'mypkg' / '__init__.py')
+  _touch(tmp_path / 'mypkg' / 'module.py')
+  _touch(tmp_path / 'mypkg' / 'sub' / '__init__.py')
+  _touch(tmp_path / 'single.py')
+  _touch(tmp_path / '.venv' / 'lib' / 'excluded.py')
+  _touch(tmp_path / 'build' / 'lib' / 'mypkg' / '__init__.py')
+  _touch(tmp_path / 'docs' / 'conf.py')
+
+  roots = find_module_roots(tmp_path)
+  assert sorted(m.name for m in roots) == ['mypkg', 'single']
+
+  by_name = {m.name: m for m in roots}
+  assert by_name['mypkg'].is_package_dir
+  assert by_name['single'].is_module_file
+  assert by_name['mypkg'].search_path == tmp_path.resolve()
+
+
+def test_find_module_roots_namespace_packages(tmp_path: Path) -> None:
+  """ Tests that namespace packages are descended into instead of being reported
+  as roots. """
+
+  # PEP 420: no __init__.py at all.
+  _touch(tmp_path / 'ns' / 'child_a' / '__init__.py')
+  # pkgutil-style namespace __init__.py.
+  _touch(tmp_path / 'legacy' / '__init__.py', PKGUTIL_INIT)
+  _touch(tmp_path / 'legacy' / 'child_b' / '__init__.py')
+  _touch(tmp_path / 'legacy' / 'child_b' / 'module.py')
+  # pkg_resources-style, with the other quote style.
+  _touch(tmp_path / 'res' / '__init__.py', '__import__("pkg_resources").declare_namespace(__name__)\n')
+  _touch(tmp_path / 'res' / 'child_c' / '__init__.py')
+
+  roots = find_module_roots(tmp_path)
+  assert sorted(m.name for m in roots) == ['legacy.child_b', 'ns.child_a', 'res.child_c']
+
+
+def test_find_module_roots_negated_exclude(tmp_path: Path) -> None:
+  """ Tests that a later negated pattern re-includes previously excluded paths. """
+
+  _touch(tmp_path / 'docs' / 'mypkg' / '__init__.py')
+
+  assert find_module_roots(tmp_path) == []
+  roots = find_module_roots(tmp_path, exclude=['docs/', '!docs/mypkg/'])
+  assert sorted(m.name for m in roots) == ['docs.mypkg']
+
+
+def test_exclude_patterns_match_gitwildmatch() -> None:
+  """ For the single-component pattern forms in #EXCLUDE_PATTERNS the combined
+  exclude regex mirrors `gitwildmatch` semantics; cross-check those against the
+  `pathspec` reference implementation when that package happens to be installed.
+  (Patterns with an internal slash anchor differently here — see the
+  `docspec_python.discovery` module docstring — and are deliberately absent from
+  both #EXCLUDE_PATTERNS and this check.) """
+
+  pathspec = pytest.importorskip('pathspec')
+  spec = pathspec.PathSpec.from_lines('gitwildmatch', EXCLUDE_PATTERNS)
+  exclude_regex, _ = _compiled_exclude_regexes(tuple(EXCLUDE_PATTERNS))
+  assert exclude_regex is not None
+
+  candidates = [
+    '__pycache__/foo.py',
+    'pkg/__pycache__/foo.py',
+    'build/lib/pkg/__init__.py',
+    'docs/conf.py',
+    'setup.py',
+    'pkg/setup.py',
+    'test_foo.py',
+    'pkg/foo_test.py',
+    'pkg/__init__.py',
+    'pkg/module.py',
+    'src/pkg/module.py',
+    'testable/module.py',
+  ]
+  for candidate in candidates:
+    assert (exclude_regex.search(candidate) is not None) == spec.match_file(candidate), candidate
+
+
+def test_discover(tmp_path: Path) -> None:
+  """ Tests the #discover() wrapper around #find_module_roots(). """
+
+  _touch(tmp_path / 'mypkg' / '__init__.py')
+  _touch(tmp_path / 'single.py')
+  _touch(tmp_path / 'ignored.tar.py')
+
+  results = {item.name: item for item in discover(tmp_path)}
+  assert sorted(results) == ['mypkg', 'single']
+  mypkg, single = results['mypkg'], results['single']
+  assert isinstance(mypkg, DiscoveryResult.Package)
+  assert mypkg.directory == str(tmp_path.resolve() / 'mypkg')
+  assert isinstance(single, DiscoveryResult.Module)
+  assert single.filename == str(tmp_path.resolve() / 'single.py')